@@ -3,19 +3,220 @@ import json
 import csv
 import getpass
 import datetime
+import argparse
+import threading
+import concurrent.futures
+import collections
+import functools
+import hashlib
+import os
+import time
+import tempfile
+import re
+import stat
+import contextlib
+import operator
+import logging
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+log = logging.getLogger('inventoryocp')
+
+# Número máximo de comandos kubectl/oc ejecutándose a la vez
+MAX_PARALLEL = 16
+
+_command_slots = threading.BoundedSemaphore(MAX_PARALLEL)
+
+# Tipos de recurso que se listan juntos, con un solo kubectl, para todo el clúster: tipo -> `kind` de sus objetos
+CLUSTER_KINDS = {
+    'pods': 'Pod',
+    'deployments': 'Deployment',
+    'services': 'Service',
+    'routes': 'Route',
+    'hpa': 'HorizontalPodAutoscaler',
+    'resourcequota': 'ResourceQuota',
+    'pvc': 'PersistentVolumeClaim',
+}
+
+# Tiempo máximo de cada petición al API server, para que una llamada colgada no bloquee el inventario
+REQUEST_TIMEOUT = '30s'
+
+def _private_runtime_dir():
+    """Devuelve $XDG_RUNTIME_DIR si es un directorio del usuario actual no accesible por otros, o None."""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        return None
+    try:
+        info = os.stat(runtime_dir)
+    except OSError:
+        return None
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        return None
+    return runtime_dir
+
+# Comando base de kubectl; la caché de discovery se guarda en memoria (tmpfs) dentro del directorio
+# privado del usuario si el sistema lo ofrece, y si no en la ubicación por defecto (~/.kube/cache)
+KUBECTL = ["kubectl", f"--request-timeout={REQUEST_TIMEOUT}"]
+_runtime_dir = _private_runtime_dir()
+KUBECTL_CACHE_DIR = os.path.join(_runtime_dir, 'inventoryocp-kubectl') if _runtime_dir else None
+if KUBECTL_CACHE_DIR is not None:
+    KUBECTL.append(f"--cache-dir={KUBECTL_CACHE_DIR}")
+
+# Namespaces excluidos del inventario: los del sistema por prefijo y `default` por nombre exacto
+_EXCLUDED_RE = re.compile(r'^(?:openshift-|kube-|hostpath-provisioner|default$)')
+
+# Tamaño de página de los listados; el API server los sirve en trozos usando el token `continue`
+CHUNK_SIZE = 500
+
+# Caché de listados del clúster: tipo -> {namespace -> objetos}
+_cluster_items = {}
+
+# Caché en disco de las consultas que apenas cambian entre ejecuciones
+CACHE_DIR = os.path.expanduser('~/.cache/inventoryocp')
+CACHE_TTL = 60
+
+_cache_settings = {'enabled': True, 'refresh': False, 'api_url': ''}
+
+def set_max_parallel(max_parallel):
+    """Ajusta el número máximo de comandos kubectl/oc simultáneos."""
+    global _command_slots
+    _command_slots = threading.BoundedSemaphore(max_parallel)
+
+def json_loads(data):
+    """Deserializa JSON con orjson si está instalado, o con la librería estándar si no."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def json_dumps(obj, indent=None):
+    """Serializa a bytes JSON con orjson si está instalado (orjson solo indenta a 2 espacios)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=indent).encode()
+
+def configure_cache(api_url, enabled=True, refresh=False):
+    """Configura la caché en disco para el clúster indicado; con `refresh` se ignoran las entradas existentes."""
+    _cache_settings['api_url'] = api_url
+    _cache_settings['enabled'] = enabled
+    _cache_settings['refresh'] = refresh
+
+def disk_cached(ttl=CACHE_TTL):
+    """Guarda en disco el resultado de la función durante `ttl` segundos, por clúster y argumentos.
+
+    La función devuelve None si la consulta falla; en ese caso se devuelve la última copia guardada
+    aunque haya caducado.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            if not _cache_settings['enabled']:
+                return func(*args)
+            key = json.dumps([_cache_settings['api_url'], func.__name__, args])
+            path = os.path.join(CACHE_DIR, hashlib.sha256(key.encode()).hexdigest() + '.json')
+            try:
+                if not _cache_settings['refresh'] and time.time() - os.path.getmtime(path) < ttl:
+                    with open(path, 'rb') as cachefile:
+                        return json_loads(cachefile.read())
+            except (OSError, ValueError):
+                pass
+
+            result = func(*args)
+            if result is None:
+                try:
+                    with open(path, 'rb') as cachefile:
+                        stale_result = json_loads(cachefile.read())
+                except (OSError, ValueError):
+                    return result
+                print(f"Using last cached result for {func.__name__}")
+                return stale_result
+            # Un fallo al escribir la caché (p. ej. HOME no escribible) no debe impedir el inventario.
+            # La caché guarda nombres de secretos y claves de configmaps: solo la puede leer el usuario
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}"
+            try:
+                os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+                os.chmod(CACHE_DIR, 0o700)
+                tmp_fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with open(tmp_fd, 'wb') as cachefile:
+                    cachefile.write(json_dumps(result))
+                os.replace(tmp_path, path)
+            except OSError:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp_path)
+            return result
+        return wrapper
+    return decorator
 
 def run_command(command):
-    """Ejecuta un comando en la terminal y devuelve la salida."""
-    result = subprocess.run(command, shell=True, capture_output=True, text=True)
+    """Ejecuta un comando (lista de argumentos, sin shell) y devuelve su salida en bytes."""
+    with _command_slots:
+        result = subprocess.run(command, capture_output=True)
     if result.returncode != 0:
-        print(f"Error executing command: {command}")
-        print(f"Error message: {result.stderr}")
+        print(f"Error executing command: {' '.join(command)}")
+        print(f"Error message: {result.stderr.decode()}")
         return None
     return result.stdout.strip()
 
+class CommandError(Exception):
+    """Error al ejecutar un comando o al leer su salida."""
+
+def stream_items(command):
+    """Ejecuta un `kubectl get ... -o json` y devuelve sus objetos uno a uno, sin cargar la respuesta completa.
+
+    Lanza CommandError si kubectl falla o su salida no es un listado JSON completo (con `items`),
+    para que un listado truncado no se tome por completo.
+    """
+    if ijson is None:
+        output = run_command(command)
+        if output is None:
+            raise CommandError(' '.join(command))
+        try:
+            items = json_loads(output)['items']
+        except (ValueError, KeyError) as error:
+            print(f"Error parsing output of command: {' '.join(command)}")
+            raise CommandError(' '.join(command)) from error
+        yield from items
+        return
+
+    with _command_slots, tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=stderr)
+        parse_error = None
+        seen_items = False
+
+        def watch_items(events):
+            # Comprueba que la respuesta trae el array `items`, como hace json_loads(...)['items']
+            nonlocal seen_items
+            for prefix, event, value in events:
+                if prefix == 'items' and event == 'start_array':
+                    seen_items = True
+                yield prefix, event, value
+
+        with process.stdout:
+            try:
+                events = watch_items(ijson.parse(process.stdout, use_float=True))
+                yield from ijson.items(events, 'items.item')
+            except ijson.JSONError as error:
+                parse_error = error
+        process.wait()
+        if process.returncode != 0:
+            stderr.seek(0)
+            print(f"Error executing command: {' '.join(command)}")
+            print(f"Error message: {stderr.read().decode()}")
+            raise CommandError(' '.join(command)) from parse_error
+        if parse_error is not None or not seen_items:
+            print(f"Error parsing output of command: {' '.join(command)}")
+            raise CommandError(' '.join(command)) from parse_error
+
 def login_to_openshift(api_url, username, password):
     """Inicia sesión en OpenShift usando oc login."""
-    command = f"oc login {api_url} -u {username} -p {password} --insecure-skip-tls-verify"
+    command = ["oc", "login", api_url, "-u", username, "-p", password, "--insecure-skip-tls-verify"]
     output = run_command(command)
     if output is not None:
         print("Successfully logged into OpenShift.")
@@ -23,64 +224,93 @@ def login_to_openshift(api_url, username, password):
         print("Failed to log into OpenShift.")
         exit(1)
 
-def get_non_openshift_namespaces():
-    """Obtiene todos los namespaces excluyendo los propios de OpenShift, default, kube, y hostpath-provisioner."""
-    all_namespaces = run_command("kubectl get namespaces -o json")
+def is_excluded_namespace(namespace):
+    """Indica si el namespace es de sistema y queda fuera del inventario."""
+    return _EXCLUDED_RE.match(namespace) is not None
+
+def fetch_all(*kinds):
+    """Lista uno o varios tipos de recurso en todos los namespaces con un solo kubectl y agrupa los objetos por tipo y namespace."""
+    items_by_kind = {kind: collections.defaultdict(list) for kind in kinds}
+    buckets = {CLUSTER_KINDS[kind]: items_by_kind[kind] for kind in kinds}
+    command = [*KUBECTL, "get", ",".join(kinds), "--all-namespaces", f"--chunk-size={CHUNK_SIZE}", "-o", "json"]
+    for item in stream_items(command):
+        # Los objetos de namespaces excluidos se descartan sin guardarlos
+        namespace = item['metadata']['namespace']
+        if not is_excluded_namespace(namespace):
+            buckets[item['kind']][namespace].append(item)
+    _cluster_items.update(items_by_kind)
+    return items_by_kind
+
+def get_namespaced_items(kind, namespace):
+    """Devuelve los objetos de un tipo en un namespace, listando el clúster si aún no están en caché."""
+    items_by_namespace = _cluster_items.get(kind)
+    if items_by_namespace is None:
+        items_by_namespace = fetch_all(kind)[kind]
+    return items_by_namespace.get(namespace, [])
+
+@disk_cached(ttl=300)
+def get_namespace_node_selectors():
+    """Obtiene el node-selector de todos los namespaces del clúster, indexado por nombre, o None si kubectl falla."""
+    # Solo el nombre y la anotación del node-selector; el resto de anotaciones
+    # (SCC, UID ranges...) ocupa varios KB por namespace y no se usa
+    all_namespaces = run_command([
+        *KUBECTL, "get", "namespaces", f"--chunk-size={CHUNK_SIZE}",
+        "-o", 'go-template={{range .items}}{{.metadata.name}}'
+              '{{range $key, $value := .metadata.annotations}}'
+              '{{if eq $key "openshift.io/node-selector"}}{{"\\tnode-selector="}}{{$value}}{{end}}{{end}}{{"\\n"}}{{end}}',
+    ])
     if all_namespaces is None:
-        return []
-    
-    namespaces = json.loads(all_namespaces)
-    excluded_prefixes = ('openshift-', 'kube-', 'default', 'hostpath-provisioner')
+        return None
+    node_selectors = {}
+    for line in all_namespaces.decode().splitlines():
+        # La marca `node-selector=` distingue una anotación vacía de una ausente,
+        # aunque run_command recorte los espacios del final de la salida
+        name, _, annotation = line.partition('\t')
+        node_selectors[name] = annotation[len('node-selector='):] if annotation else 'N/A'
+    return node_selectors
+
+def get_non_openshift_namespaces():
+    """Obtiene todos los namespaces, con su node-selector, excluyendo los propios de OpenShift, default, kube, y hostpath-provisioner.
+
+    Devuelve None si no se ha podido listar los namespaces.
+    """
+    node_selectors = get_namespace_node_selectors()
+    if node_selectors is None:
+        return None
     non_excluded_namespaces = [
-        ns['metadata']['name'] for ns in namespaces['items']
-        if not ns['metadata']['name'].startswith(excluded_prefixes)
+        (name, node_selector) for name, node_selector in node_selectors.items()
+        if not is_excluded_namespace(name)
     ]
     return non_excluded_namespaces
 
 def get_pod_info(namespace):
     """Obtiene información de los pods en un namespace."""
-    pods = run_command(f"kubectl get pods -n {namespace} -o json")
-    if pods is None:
-        return []
     pod_info = []
 
-    pods_json = json.loads(pods)
-    for pod in pods_json['items']:
-        pod_name = pod['metadata']['name']
-        node_name = pod['spec'].get('nodeName', 'N/A')
-        labels = pod['metadata'].get('labels', {})
-        resources = pod['spec']['containers'][0].get('resources', {})
-        readiness_probe = pod['spec']['containers'][0].get('readinessProbe', {})
-        liveness_probe = pod['spec']['containers'][0].get('livenessProbe', {})
-        image = pod['spec']['containers'][0]['image']
-        pod_info.append({
-            'name': pod_name,
-            'node_name': node_name,
-            'labels': labels,
-            'resources': resources,
-            'readiness_probe': readiness_probe,
-            'liveness_probe': liveness_probe,
-            'image': image
-        })
+    for pod in get_namespaced_items('pods', namespace):
+        metadata = pod['metadata']
+        spec = pod['spec']
+        pod_name = metadata['name']
+        node_name = spec.get('nodeName', 'N/A')
+        labels = metadata.get('labels', {})
+        # Una entrada por contenedor, para no perder los sidecars
+        for container in spec['containers']:
+            pod_info.append({
+                'name': pod_name,
+                'container_name': container['name'],
+                'node_name': node_name,
+                'labels': labels,
+                'resources': container.get('resources', {}),
+                'readiness_probe': container.get('readinessProbe', {}),
+                'liveness_probe': container.get('livenessProbe', {}),
+                'image': container['image']
+            })
     return pod_info
 
-def get_node_selector(namespace):
-    """Obtiene el node selector del namespace."""
-    namespace_info = run_command(f"kubectl get namespace {namespace} -o json")
-    if namespace_info is None:
-        return {}
-    namespace_json = json.loads(namespace_info)
-    node_selector = namespace_json['metadata'].get('annotations', {}).get('openshift.io/node-selector', 'N/A')
-    return node_selector
-
 def get_resource_quotas(namespace):
     """Obtiene las cuotas de recursos del namespace."""
-    quotas = run_command(f"kubectl get resourcequota -n {namespace} -o json")
-    if quotas is None:
-        return []
-    quotas_json = json.loads(quotas)
     quota_info = []
-    for quota in quotas_json['items']:
+    for quota in get_namespaced_items('resourcequota', namespace):
         quota_name = quota['metadata']['name']
         hard_limits = quota['spec']['hard']
         quota_info.append({
@@ -89,31 +319,42 @@ def get_resource_quotas(namespace):
         })
     return quota_info
 
+@disk_cached(ttl=600)
+def list_persistent_volumes():
+    """Obtiene los volúmenes persistentes del clúster, o None si kubectl falla."""
+    try:
+        return list(stream_items([*KUBECTL, "get", "pv", f"--chunk-size={CHUNK_SIZE}", "-o", "json"]))
+    except CommandError:
+        return None
+
+def fetch_all_persistent_volumes():
+    """Agrupa los volúmenes persistentes del clúster por el namespace de su claim."""
+    pvs_by_namespace = collections.defaultdict(list)
+    for pv in list_persistent_volumes() or []:
+        # Los volúmenes sin claim (Available) no pertenecen a ningún namespace
+        claim_ref = pv['spec'].get('claimRef')
+        if claim_ref is None:
+            continue
+        pvs_by_namespace[claim_ref['namespace']].append({
+            'name': pv['metadata']['name'],
+            'capacity': pv['spec']['capacity']['storage'],
+            'access_modes': pv['spec']['accessModes'],
+            'reclaim_policy': pv['spec']['persistentVolumeReclaimPolicy'],
+        })
+    _cluster_items['pv'] = pvs_by_namespace
+    return pvs_by_namespace
+
 def get_persistent_volumes(namespace):
     """Obtiene los volúmenes persistentes del namespace."""
-    pvs = run_command("kubectl get pv -o json")
-    if pvs is None:
-        return []
-    pvs_json = json.loads(pvs)
-    pv_info = []
-    for pv in pvs_json['items']:
-        if pv['spec']['claimRef']['namespace'] == namespace:
-            pv_info.append({
-                'name': pv['metadata']['name'],
-                'capacity': pv['spec']['capacity']['storage'],
-                'access_modes': pv['spec']['accessModes'],
-                'reclaim_policy': pv['spec']['persistentVolumeReclaimPolicy'],
-            })
-    return pv_info
+    pvs_by_namespace = _cluster_items.get('pv')
+    if pvs_by_namespace is None:
+        pvs_by_namespace = fetch_all_persistent_volumes()
+    return pvs_by_namespace.get(namespace, [])
 
 def get_persistent_volume_claims(namespace):
     """Obtiene las reclamaciones de volúmenes persistentes del namespace."""
-    pvcs = run_command(f"kubectl get pvc -n {namespace} -o json")
-    if pvcs is None:
-        return []
-    pvcs_json = json.loads(pvcs)
     pvc_info = []
-    for pvc in pvcs_json['items']:
+    for pvc in get_namespaced_items('pvc', namespace):
         pvc_info.append({
             'name': pvc['metadata']['name'],
             'volume_name': pvc['spec']['volumeName'],
@@ -122,60 +363,101 @@ def get_persistent_volume_claims(namespace):
         })
     return pvc_info
 
-def get_secrets(namespace):
-    """Obtiene los secretos del namespace."""
-    secrets = run_command(f"kubectl get secret -n {namespace} -o json")
+@disk_cached(ttl=3600)
+def list_secrets():
+    """Obtiene una línea `namespace nombre tipo` por cada secreto del clúster, sin traer su contenido, o None si kubectl falla."""
+    secrets = run_command([
+        *KUBECTL, "get", "secret", "--all-namespaces", f"--chunk-size={CHUNK_SIZE}", "--no-headers",
+        "-o", "custom-columns=NAMESPACE:.metadata.namespace,NAME:.metadata.name,TYPE:.type",
+    ])
     if secrets is None:
-        return []
-    secrets_json = json.loads(secrets)
-    secret_info = []
-    for secret in secrets_json['items']:
-        secret_info.append({
-            'name': secret['metadata']['name'],
-            'type': secret['type'],
+        return None
+    return secrets.decode().splitlines()
+
+def fetch_all_secrets():
+    """Agrupa nombre y tipo de los secretos del clúster por namespace."""
+    secrets_by_namespace = collections.defaultdict(list)
+    for line in list_secrets() or []:
+        namespace, secret_name, secret_type = line.split()
+        if is_excluded_namespace(namespace):
+            continue
+        secrets_by_namespace[namespace].append({
+            'name': secret_name,
+            'type': secret_type,
         })
-    return secret_info
+    _cluster_items['secret'] = secrets_by_namespace
+    return secrets_by_namespace
 
-def get_configmaps(namespace):
-    """Obtiene los configmaps del namespace."""
-    configmaps = run_command(f"kubectl get configmap -n {namespace} -o json")
+def get_secrets(namespace):
+    """Obtiene los secretos del namespace."""
+    secrets_by_namespace = _cluster_items.get('secret')
+    if secrets_by_namespace is None:
+        secrets_by_namespace = fetch_all_secrets()
+    return secrets_by_namespace.get(namespace, [])
+
+@disk_cached(ttl=3600)
+def list_configmaps():
+    """Obtiene una línea `namespace nombre claves...` por cada configmap del clúster, sin traer sus valores, o None si kubectl falla."""
+    configmaps = run_command([
+        *KUBECTL, "get", "configmap", "--all-namespaces", f"--chunk-size={CHUNK_SIZE}",
+        "-o", 'go-template={{range .items}}{{.metadata.namespace}} {{.metadata.name}}'
+              '{{range $key, $value := .data}} {{$key}}{{end}}{{"\\n"}}{{end}}',
+    ])
     if configmaps is None:
-        return []
-    configmaps_json = json.loads(configmaps)
-    configmap_info = []
-    for configmap in configmaps_json['items']:
-        data_keys = list(configmap.get('data', {}).keys())
-        configmap_info.append({
-            'name': configmap['metadata']['name'],
+        return None
+    return configmaps.decode().splitlines()
+
+def fetch_all_configmaps():
+    """Agrupa nombre y claves de los configmaps del clúster por namespace."""
+    configmaps_by_namespace = collections.defaultdict(list)
+    for line in list_configmaps() or []:
+        namespace, configmap_name, *data_keys = line.split()
+        if is_excluded_namespace(namespace):
+            continue
+        configmaps_by_namespace[namespace].append({
+            'name': configmap_name,
             'data_keys': data_keys,
         })
-    return configmap_info
+    _cluster_items['configmap'] = configmaps_by_namespace
+    return configmaps_by_namespace
+
+def get_configmaps(namespace):
+    """Obtiene los configmaps del namespace."""
+    configmaps_by_namespace = _cluster_items.get('configmap')
+    if configmaps_by_namespace is None:
+        configmaps_by_namespace = fetch_all_configmaps()
+    return configmaps_by_namespace.get(namespace, [])
+
+def fetch_all_pod_metrics():
+    """Obtiene las métricas de cada contenedor de todos los pods del clúster y las agrupa por namespace."""
+    metrics_by_namespace = collections.defaultdict(dict)
+    metrics_output = run_command([*KUBECTL, "top", "pod", "--all-namespaces", "--containers", "--no-headers"])
+    if metrics_output:
+        for line in metrics_output.decode().splitlines():
+            parts = line.split()
+            namespace = parts[0]
+            pod_name = parts[1]
+            container_name = parts[2]
+            cpu = parts[3]
+            memory = parts[4]
+            if is_excluded_namespace(namespace):
+                continue
+            metrics_by_namespace[namespace][(pod_name, container_name)] = {'cpu': cpu, 'memory': memory}
+    _cluster_items['pod_metrics'] = metrics_by_namespace
+    return metrics_by_namespace
 
 def get_pod_metrics(namespace):
-    """Obtiene métricas de los pods en un namespace."""
-    metrics_output = run_command(f"kubectl top pod -n {namespace} --no-headers")
-    if not metrics_output:
-        return {}
-    
-    pod_metrics = {}
-    for line in metrics_output.splitlines():
-        parts = line.split()
-        pod_name = parts[0]
-        cpu = parts[1]
-        memory = parts[2]
-        pod_metrics[pod_name] = {'cpu': cpu, 'memory': memory}
-
-    return pod_metrics
+    """Obtiene métricas de los contenedores de un namespace, indexadas por (pod, contenedor)."""
+    metrics_by_namespace = _cluster_items.get('pod_metrics')
+    if metrics_by_namespace is None:
+        metrics_by_namespace = fetch_all_pod_metrics()
+    return metrics_by_namespace.get(namespace, {})
 
 def get_deployments_info(namespace):
     """Obtiene información de los despliegues en un namespace."""
-    deployments = run_command(f"kubectl get deployments -n {namespace} -o json")
-    if deployments is None:
-        return []
     deployment_info = []
 
-    deployments_json = json.loads(deployments)
-    for deployment in deployments_json['items']:
+    for deployment in get_namespaced_items('deployments', namespace):
         deployment_name = deployment['metadata']['name']
         replicas = deployment['spec']['replicas']
         labels = deployment['metadata'].get('labels', {})
@@ -188,13 +470,9 @@ def get_deployments_info(namespace):
 
 def get_services_info(namespace):
     """Obtiene información de los servicios en un namespace."""
-    services = run_command(f"kubectl get services -n {namespace} -o json")
-    if services is None:
-        return []
     service_info = []
 
-    services_json = json.loads(services)
-    for service in services_json['items']:
+    for service in get_namespaced_items('services', namespace):
         service_name = service['metadata']['name']
         service_type = service['spec']['type']
         ports = service['spec'].get('ports', [])
@@ -207,13 +485,9 @@ def get_services_info(namespace):
 
 def get_routes_info(namespace):
     """Obtiene información de las rutas en un namespace."""
-    routes = run_command(f"kubectl get routes -n {namespace} -o json")
-    if routes is None:
-        return []
     route_info = []
 
-    routes_json = json.loads(routes)
-    for route in routes_json['items']:
+    for route in get_namespaced_items('routes', namespace):
         route_name = route['metadata']['name']
         host = route['spec']['host']
         route_info.append({
@@ -224,13 +498,9 @@ def get_routes_info(namespace):
 
 def get_hpa_info(namespace):
     """Obtiene información de los HPA en un namespace."""
-    hpas = run_command(f"kubectl get hpa -n {namespace} -o json")
-    if hpas is None:
-        return []
     hpa_info = []
 
-    hpas_json = json.loads(hpas)
-    for hpa in hpas_json['items']:
+    for hpa in get_namespaced_items('hpa', namespace):
         hpa_name = hpa['metadata']['name']
         min_replicas = hpa['spec'].get('minReplicas', 1)
         max_replicas = hpa['spec']['maxReplicas']
@@ -243,154 +513,221 @@ def get_hpa_info(namespace):
         })
     return hpa_info
 
-def generate_inventory():
-    """Genera un inventario de los microservicios y lo guarda en archivos CSV y JSON."""
-    inventory = []
+# Columnas del archivo CSV de cada tipo de recurso
+CSV_SCHEMAS = {
+    'pods': [
+        'namespace', 'pod_name', 'container_name', 'node_name', 'pod_labels', 'pod_resources', 'pod_readiness_probe', 'pod_liveness_probe',
+        'pod_image', 'pod_cpu_usage', 'pod_memory_usage', 'node_selector'
+    ],
+    'deployments': ['namespace', 'deployment_name', 'deployment_replicas', 'deployment_labels', 'node_selector'],
+    'services': ['namespace', 'service_name', 'service_type', 'service_ports', 'node_selector'],
+    'routes': ['namespace', 'route_name', 'route_host', 'node_selector'],
+    'hpas': [
+        'namespace', 'hpa_name', 'hpa_min_replicas', 'hpa_max_replicas', 'hpa_current_cpu_utilization', 'node_selector'
+    ],
+    'quotas': ['namespace', 'quota_name', 'quota_limits', 'node_selector'],
+    'pvs': ['namespace', 'pv_name', 'pv_capacity', 'pv_access_modes', 'pv_reclaim_policy', 'node_selector'],
+    'pvcs': ['namespace', 'pvc_name', 'pvc_volume_name', 'pvc_access_modes', 'pvc_capacity', 'node_selector'],
+    'secrets': ['namespace', 'secret_name', 'secret_type', 'node_selector'],
+    'configmaps': ['namespace', 'configmap_name', 'configmap_data_keys', 'node_selector'],
+}
+
+def collect_namespace(namespace, node_selector):
+    """Construye las filas de inventario de un namespace, agrupadas por tipo de recurso."""
+    log.info("Processing namespace: %s", namespace)
+    pod_info = get_pod_info(namespace)
+    pod_metrics = get_pod_metrics(namespace)
+    deployments_info = get_deployments_info(namespace)
+    services_info = get_services_info(namespace)
+    routes_info = get_routes_info(namespace)
+    hpa_info = get_hpa_info(namespace)
+    quotas_info = get_resource_quotas(namespace)
+    pv_info = get_persistent_volumes(namespace)
+    pvc_info = get_persistent_volume_claims(namespace)
+    secret_info = get_secrets(namespace)
+    configmap_info = get_configmaps(namespace)
+
+    inventory = {kind: [] for kind in CSV_SCHEMAS}
+    for pod in pod_info:
+        pod_name = pod['name']
+        node_name = pod['node_name']
+        metrics = pod_metrics.get((pod_name, pod['container_name']), {})
+        inventory['pods'].append({
+            'namespace': namespace,
+            'pod_name': pod_name,
+            'container_name': pod['container_name'],
+            'node_name': node_name,
+            'pod_labels': pod['labels'],
+            'pod_resources': pod['resources'],
+            'pod_readiness_probe': pod['readiness_probe'],
+            'pod_liveness_probe': pod['liveness_probe'],
+            'pod_image': pod['image'],
+            'pod_cpu_usage': metrics.get('cpu', 'N/A'),
+            'pod_memory_usage': metrics.get('memory', 'N/A'),
+            'node_selector': node_selector
+        })
 
-    namespaces = get_non_openshift_namespaces()
-    for namespace in namespaces:
-        print(f"Processing namespace: {namespace}")
-        pod_info = get_pod_info(namespace)
-        pod_metrics = get_pod_metrics(namespace)
-        deployments_info = get_deployments_info(namespace)
-        services_info = get_services_info(namespace)
-        routes_info = get_routes_info(namespace)
-        hpa_info = get_hpa_info(namespace)
-        node_selector = get_node_selector(namespace)
-        quotas_info = get_resource_quotas(namespace)
-        pv_info = get_persistent_volumes(namespace)
-        pvc_info = get_persistent_volume_claims(namespace)
-        secret_info = get_secrets(namespace)
-        configmap_info = get_configmaps(namespace)
-        
-        for pod in pod_info:
-            pod_name = pod['name']
-            node_name = pod['node_name']
-            metrics = pod_metrics.get(pod_name, {})
-            inventory.append({
-                'namespace': namespace,
-                'pod_name': pod_name,
-                'node_name': node_name,
-                'pod_labels': pod['labels'],
-                'pod_resources': pod['resources'],
-                'pod_readiness_probe': pod['readiness_probe'],
-                'pod_liveness_probe': pod['liveness_probe'],
-                'pod_image': pod['image'],
-                'pod_cpu_usage': metrics.get('cpu', 'N/A'),
-                'pod_memory_usage': metrics.get('memory', 'N/A'),
-                'node_selector': node_selector
-            })
+    for deployment in deployments_info:
+        inventory['deployments'].append({
+            'namespace': namespace,
+            'deployment_name': deployment['name'],
+            'deployment_replicas': deployment['replicas'],
+            'deployment_labels': deployment['labels'],
+            'node_selector': node_selector
+        })
 
-        for deployment in deployments_info:
-            inventory.append({
-                'namespace': namespace,
-                'deployment_name': deployment['name'],
-                'deployment_replicas': deployment['replicas'],
-                'deployment_labels': deployment['labels'],
-                'node_selector': node_selector
-            })
+    for service in services_info:
+        inventory['services'].append({
+            'namespace': namespace,
+            'service_name': service['name'],
+            'service_type': service['type'],
+            'service_ports': service['ports'],
+            'node_selector': node_selector
+        })
 
-        for service in services_info:
-            inventory.append({
-                'namespace': namespace,
-                'service_name': service['name'],
-                'service_type': service['type'],
-                'service_ports': service['ports'],
-                'node_selector': node_selector
-            })
+    for route in routes_info:
+        inventory['routes'].append({
+            'namespace': namespace,
+            'route_name': route['name'],
+            'route_host': route['host'],
+            'node_selector': node_selector
+        })
 
-        for route in routes_info:
-            inventory.append({
-                'namespace': namespace,
-                'route_name': route['name'],
-                'route_host': route['host'],
-                'node_selector': node_selector
-            })
+    for hpa in hpa_info:
+        inventory['hpas'].append({
+            'namespace': namespace,
+            'hpa_name': hpa['name'],
+            'hpa_min_replicas': hpa['min_replicas'],
+            'hpa_max_replicas': hpa['max_replicas'],
+            'hpa_current_cpu_utilization': hpa['current_cpu_utilization'],
+            'node_selector': node_selector
+        })
 
-        for hpa in hpa_info:
-            inventory.append({
-                'namespace': namespace,
-                'hpa_name': hpa['name'],
-                'hpa_min_replicas': hpa['min_replicas'],
-                'hpa_max_replicas': hpa['max_replicas'],
-                'hpa_current_cpu_utilization': hpa['current_cpu_utilization'],
-                'node_selector': node_selector
-            })
+    for quota in quotas_info:
+        inventory['quotas'].append({
+            'namespace': namespace,
+            'quota_name': quota['name'],
+            'quota_limits': quota['limits'],
+            'node_selector': node_selector
+        })
 
-        for quota in quotas_info:
-            inventory.append({
-                'namespace': namespace,
-                'quota_name': quota['name'],
-                'quota_limits': quota['limits'],
-                'node_selector': node_selector
-            })
+    for pv in pv_info:
+        inventory['pvs'].append({
+            'namespace': namespace,
+            'pv_name': pv['name'],
+            'pv_capacity': pv['capacity'],
+            'pv_access_modes': pv['access_modes'],
+            'pv_reclaim_policy': pv['reclaim_policy'],
+            'node_selector': node_selector
+        })
 
-        for pv in pv_info:
-            inventory.append({
-                'namespace': namespace,
-                'pv_name': pv['name'],
-                'pv_capacity': pv['capacity'],
-                'pv_access_modes': pv['access_modes'],
-                'pv_reclaim_policy': pv['reclaim_policy'],
-                'node_selector': node_selector
-            })
+    for pvc in pvc_info:
+        inventory['pvcs'].append({
+            'namespace': namespace,
+            'pvc_name': pvc['name'],
+            'pvc_volume_name': pvc['volume_name'],
+            'pvc_access_modes': pvc['access_modes'],
+            'pvc_capacity': pvc['capacity'],
+            'node_selector': node_selector
+        })
 
-        for pvc in pvc_info:
-            inventory.append({
-                'namespace': namespace,
-                'pvc_name': pvc['name'],
-                'pvc_volume_name': pvc['volume_name'],
-                'pvc_access_modes': pvc['access_modes'],
-                'pvc_capacity': pvc['capacity'],
-                'node_selector': node_selector
-            })
+    for secret in secret_info:
+        inventory['secrets'].append({
+            'namespace': namespace,
+            'secret_name': secret['name'],
+            'secret_type': secret['type'],
+            'node_selector': node_selector
+        })
 
-        for secret in secret_info:
-            inventory.append({
-                'namespace': namespace,
-                'secret_name': secret['name'],
-                'secret_type': secret['type'],
-                'node_selector': node_selector
-            })
+    for configmap in configmap_info:
+        inventory['configmaps'].append({
+            'namespace': namespace,
+            'configmap_name': configmap['name'],
+            'configmap_data_keys': configmap['data_keys'],
+            'node_selector': node_selector
+        })
 
-        for configmap in configmap_info:
-            inventory.append({
-                'namespace': namespace,
-                'configmap_name': configmap['name'],
-                'configmap_data_keys': configmap['data_keys'],
-                'node_selector': node_selector
-            })
+    return inventory
+
+def generate_inventory(max_parallel=MAX_PARALLEL):
+    """Genera un inventario de los microservicios y lo guarda en archivos CSV y JSON."""
+    set_max_parallel(max_parallel)
+
+    namespaces = get_non_openshift_namespaces()
+    if namespaces is None:
+        # Sin la lista de namespaces no se sobrescriben los archivos con un inventario vacío
+        print("Failed to list namespaces.")
+        exit(1)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel) as executor:
+        # Un único listado para todo el clúster en lugar de uno por namespace y tipo
+        prefetches = [executor.submit(fetch_all, *CLUSTER_KINDS)]
+        prefetches.append(executor.submit(fetch_all_pod_metrics))
+        prefetches.append(executor.submit(fetch_all_secrets))
+        prefetches.append(executor.submit(fetch_all_configmaps))
+        prefetches.append(executor.submit(fetch_all_persistent_volumes))
+        try:
+            for prefetch in prefetches:
+                prefetch.result()
+        except CommandError:
+            # Un inventario con el listado de cargas de trabajo incompleto no es fiable
+            print("Failed to list cluster resources.")
+            exit(1)
 
     # Obtener la fecha actual para usarla en el nombre de los archivos
     date_str = datetime.datetime.now().strftime("%Y%m%d")
 
-    # Guardar el inventario en un archivo CSV
-    with open(f'inventario_{date_str}.csv', 'w', newline='') as csvfile:
-        fieldnames = [
-            'namespace', 'pod_name', 'node_name', 'pod_labels', 'pod_resources', 'pod_readiness_probe', 'pod_liveness_probe',
-            'pod_image', 'pod_cpu_usage', 'pod_memory_usage', 'deployment_name', 'deployment_replicas', 'deployment_labels',
-            'service_name', 'service_type', 'service_ports', 'route_name', 'route_host',
-            'hpa_name', 'hpa_min_replicas', 'hpa_max_replicas', 'hpa_current_cpu_utilization',
-            'quota_name', 'quota_limits', 'pv_name', 'pv_capacity', 'pv_access_modes', 'pv_reclaim_policy',
-            'pvc_name', 'pvc_volume_name', 'pvc_access_modes', 'pvc_capacity',
-            'secret_name', 'secret_type', 'configmap_name', 'configmap_data_keys', 'node_selector'
-        ]
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-
-        writer.writeheader()
-        for entry in inventory:
-            writer.writerow(entry)
-    print(f"Inventario generado en 'inventario_{date_str}.csv'")
-
-    # Guardar el inventario en un archivo JSON
-    with open(f'inventario_{date_str}.json', 'w') as jsonfile:
-        json.dump(inventory, jsonfile, indent=2)
+    # Escribir cada namespace en los archivos CSV y JSON según se procesa,
+    # sin acumular el inventario completo en memoria
+    csv_paths = {kind: f'inventario_{date_str}_{kind}.csv' for kind in CSV_SCHEMAS}
+    with contextlib.ExitStack() as stack:
+        writers = {}
+        row_getters = {}
+        for kind, fieldnames in CSV_SCHEMAS.items():
+            csvfile = stack.enter_context(open(csv_paths[kind], 'w', newline='', buffering=1 << 20))
+            writers[kind] = csv.writer(csvfile)
+            writers[kind].writerow(fieldnames)
+            row_getters[kind] = operator.itemgetter(*fieldnames)
+        jsonfile = stack.enter_context(open(f'inventario_{date_str}.json', 'wb'))
+
+        # Mismo formato que json.dump(inventory, indent=2), elemento a elemento
+        jsonfile.write(b'[')
+        separator = b'\n  '
+        for namespace, node_selector in namespaces:
+            namespace_inventory = collect_namespace(namespace, node_selector)
+            for kind, entries in namespace_inventory.items():
+                writers[kind].writerows(map(row_getters[kind], entries))
+                for entry in entries:
+                    jsonfile.write(separator + json_dumps(entry, indent=2).replace(b'\n', b'\n  '))
+                    separator = b',\n  '
+        jsonfile.write(b']' if separator == b'\n  ' else b'\n]')
+    for csv_path in csv_paths.values():
+        print(f"Inventario generado en '{csv_path}'")
     print(f"Inventario generado en 'inventario_{date_str}.json'")
 
+def positive_int(value):
+    """Convierte un argumento de la línea de comandos en un entero mayor que cero."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {value}")
+    return number
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un inventario de los microservicios de un clúster OpenShift.")
+    parser.add_argument('--max-parallel', type=positive_int, default=MAX_PARALLEL,
+                        help="Número máximo de comandos kubectl/oc simultáneos (por defecto: %(default)s).")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="No usar la caché en disco de namespaces, volúmenes persistentes, secretos y configmaps.")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Volver a consultar el clúster y renovar la caché en disco.")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Mostrar el progreso por namespace.")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+
     api_url = input("Ingrese la URL del clúster de OpenShift: ")
     username = input("Ingrese el nombre de usuario: ")
     password = getpass.getpass("Ingrese la contraseña: ")
 
     login_to_openshift(api_url, username, password)
-    generate_inventory()
\ No newline at end of file
+    configure_cache(api_url, enabled=not args.no_cache, refresh=args.refresh)
+    generate_inventory(max_parallel=args.max_parallel)
\ No newline at end of file